@@ -0,0 +1,1036 @@
+"""
+This file is part of TexText, an extension for the vector
+illustration program Inkscape.
+
+Copyright (c) 2006-2023 TexText developers.
+
+TexText is released under the 3-Clause BSD license. See
+file LICENSE.txt or go to https://github.com/textext/textext
+for full license details.
+
+The GTK3 dialog of TexText (with source highlighting if GTKSourceView
+is available), see asktext.py. This module is only imported when GTK
+is available.
+"""
+
+import os
+import warnings
+from .asktext import AskText, import_gui_toolkit, decode_process_output, GTK, GTKSOURCEVIEW
+from .utility import SuppressStream
+
+# Ensure that the bindings have been imported before fetching them from asktext
+TOOLKIT = import_gui_toolkit()
+from .asktext import Gtk, Gdk, GdkPixbuf, GLib
+if TOOLKIT == GTKSOURCEVIEW:
+    from .asktext import GtkSource
+try:
+    from gi.repository import Pango
+except ImportError:
+    Pango = None
+
+# GDK values and functions used by the key press and button press handlers
+_CONTROL_MASK = Gdk.ModifierType.CONTROL_MASK
+_DOUBLE_CLICK = Gdk.EventType._2BUTTON_PRESS
+_keyval_name = Gdk.keyval_name
+
+# Enum values used by the word wrap menu item and the preview scaling
+_WRAP_WORD = Gtk.WrapMode.WORD
+_WRAP_NONE = Gtk.WrapMode.NONE
+_BILINEAR = GdkPixbuf.InterpType.BILINEAR
+
+# Gtk.FileChooserButton is not available in all GTK bindings, a Gtk.Entry is used instead then
+_HAS_FILE_CHOOSER_BUTTON = hasattr(Gtk, 'FileChooserButton')
+
+
+# The GTK dialog uses deprecated API (Gtk.Action, stock items, ...), the deprecation warnings
+# are ignored while the dialog is shown, see AskTextGTKSource.ask
+_WARNING_FILTERS = (
+    dict(action="ignore", category=DeprecationWarning),
+)
+
+
+# Menu bar description for Gtk.UIManager, see AskTextGTKSource.get_view_ui_description
+_VIEW_UI_DESCRIPTION = None
+
+# Pango font descriptions of the editor, by font size in pt
+_FONT_DESC_CACHE = {}
+
+# Decoded window and alignment icons, kept for the lifetime of the process
+_ICON_CACHE = None
+_ALIGNMENT_ICON_CACHE = None
+
+
+def get_window_icons():
+    """
+    Load the TexText logo in all available sizes for usage as window icons
+
+    The icons are decoded only once, subsequent calls return the cached pixbufs.
+    :return: A list of GdkPixbuf.Pixbuf objects
+    """
+    global _ICON_CACHE
+    if _ICON_CACHE is None:
+        icon_files = [os.path.join(
+            os.path.dirname(__file__),
+            "icons",
+            "logo-{size}x{size}.png".format(size=size))
+            for size in [16, 32, 64, 128]]
+        _ICON_CACHE = [GdkPixbuf.Pixbuf.new_from_file(path) for path in icon_files if os.path.isfile(path)]
+    return _ICON_CACHE
+
+
+def get_alignment_icons():
+    """
+    Load the icons of the alignment combobox, one for each entry of AskText.ALIGNMENT_LABELS
+
+    The icons are decoded only once, subsequent calls return the cached pixbufs.
+    :return: A list of GdkPixbuf.Pixbuf objects
+    """
+    global _ALIGNMENT_ICON_CACHE
+    if _ALIGNMENT_ICON_CACHE is None:
+        icons = []
+        for a in AskText.ALIGNMENT_LABELS:
+            args = tuple(a.split(" "))
+            path = os.path.join(os.path.dirname(__file__), "icons", "alignment-%s-%s.svg.png" % args)
+            assert os.path.exists(path)
+            icons.append(GdkPixbuf.Pixbuf.new_from_file(path))
+        _ALIGNMENT_ICON_CACHE = icons
+    return _ALIGNMENT_ICON_CACHE
+
+
+def set_monospace_font(text_view, font_size):
+    """
+    Set the font to monospace in the text view
+    :param text_view: A GTK TextView
+    :param font_size: The font size in the TextView in pt
+    """
+    if Pango is None:
+        return
+    font_desc = _FONT_DESC_CACHE.get(font_size)
+    if font_desc is None:
+        font_desc = _FONT_DESC_CACHE[font_size] = Pango.FontDescription('monospace %d' % (font_size))
+    if font_desc:
+        text_view.modify_font(font_desc)
+
+
+class AskTextGTKSource(AskText):
+    """GTK + Source Highlighting for editing TexText objects"""
+
+    # Radio actions of the menus, they do not depend on the dialog instance
+    _font_size_actions = (
+        ('FontSize11', None, '1_1 pt', None, 'Set editor font size to 11pt', 0),
+        ('FontSize12', None, '1_2 pt', None, 'Set editor font size to 12pt', 1),
+        ('FontSize14', None, '1_4 pt', None, 'Set editor font size to 14pt', 2),
+        ('FontSize16', None, '1_6 pt', None, 'Set editor font size to 16pt', 3)
+    )
+
+    _tabs_width_actions = tuple(
+        ('TabsWidth%d' % num, None, '%d' % num, None, 'Set tabulation width to %d spaces' % num, num) for num in
+        range(2, 13, 2))
+
+    _new_node_content_actions = (
+        #     name of action ,   stock id,    label, accelerator,  tooltip, callback/value
+        ('NewNodeContentEmpty', None, '_Empty', None, 'New node will be initialized with empty content', 0),
+        ('NewNodeContentInlineMath', None, '_Inline math', None, 'New node will be initialized with $ $', 1),
+        ('NewNodeContentDisplayMath', None, '_Display math', None, 'New node will be initialized with $$ $$', 2)
+    )
+
+    _close_shortcut_actions = (
+        ('CloseShortcutEscape', None, '_ESC', None, 'TexText window closes when pressing ESC', 0),
+        ('CloseShortcutCtrlQ', None, 'CTRL + _Q', None, 'TexText window closes when pressing CTRL + Q', 1),
+        ('CloseShortcutNone', None, '_None', None, 'No shortcut for closing TexText window', 2)
+    )
+    _close_shortcut_tooltips = tuple("Don't save changes ({})".format(label.replace("_", ""))
+                                     for (_, _, label, _, _, _) in _close_shortcut_actions)
+
+    def __init__(self, version_str, text, preamble_file, global_scale_factor, current_scale_factor, current_alignment,
+                 current_texcmd, current_convert_strokes_to_path, tex_commands, gui_config):
+        super(AskTextGTKSource, self).__init__(version_str, text, preamble_file, global_scale_factor, current_scale_factor,
+                                               current_alignment, current_texcmd, current_convert_strokes_to_path,
+                                               tex_commands, gui_config)
+        self._preview = None  # type: Gtk.Image
+        self._pixbuf = None  # type: GdkPixbuf
+        self._scaled_pixbuf = (None, None)  # (width, height), scaled copy of self._pixbuf
+        self._source_text = None  # Content of self._source_buffer, None if it has to be fetched again
+        self.preview_representation = "SCALE"  # type: str
+        self._preview_scroll_window = None  # type: Gtk.ScrolledWindow
+        self._scale_adj = None
+        self._texcmd_cbox = None
+        self._preview_callback = None
+        self._source_view = None
+        self._preamble_delete_btn = None
+        self._preamble_getter = None  # get_filename or get_text of self._preamble_widget
+        self._preamble_setter = None  # set_filename or set_text of self._preamble_widget
+        self._file_chooser = None  # type: Gtk.FileChooserDialog
+        self._close_shortcut = self._gui_config.get("close_shortcut", self.DEFAULT_CLOSE_SHORTCUT)
+
+        self.buffer_actions = [
+            ('Open', Gtk.STOCK_OPEN, '_Open', '<control>O', 'Open a file', self.open_file_cb)
+        ]
+
+        if TOOLKIT == GTKSOURCEVIEW:
+            self._view_actions = [
+                ('FileMenu', None, '_File'),
+                ('ViewMenu', None, '_View'),
+                ('SettingsMenu', None, '_Settings'),
+                ('FontSize', None, 'Editor Font Si_ze'),
+                ('NewNodeContent', None, '_New Node Content'),
+                ('CloseShortcut', None, 'Close TexText _Shortcut'),
+                ('TabsWidth', None, '_Tabs Width'),
+            ]
+        else:
+            self._view_actions = [
+                ('FileMenu', None, '_File'),
+                ('ViewMenu', None, '_View'),
+                ('SettingsMenu', None, '_Settings'),
+                ('FontSize', None, 'Editor Font Si_ze'),
+                ('NewNodeContent', None, '_New Node Content'),
+                ('CloseShortcut', None, '_Close TexText Shortcut'),
+            ]
+
+        self._word_wrap_action = [
+            ('WordWrap', None, '_Word Wrap', None,
+             'Wrap long lines in editor to avoid horizontal scrolling', self.word_wrap_toggled_cb)
+        ]
+
+        self._preview_white_background_action = [
+            ('WhitePreviewBackground', None, 'White preview background', None,
+             'Set preview background to white', self.on_preview_background_chagned)
+        ]
+
+        self._confirm_close_action = [
+            ('ConfirmClose', None, '_Confirm Closing of Window', None,
+             'Request confirmation for closing the window when text has been changed', self.confirm_close_toggled_cb)
+        ]
+
+        # Actions for the GTKSourceView features, not needed at all with plain GTK
+        if TOOLKIT == GTKSOURCEVIEW:
+            self._toggle_actions = [
+                ('ShowNumbers', None, 'Show _Line Numbers', None,
+                 'Toggle visibility of line numbers in the left margin', self.numbers_toggled_cb),
+                ('AutoIndent', None, 'Enable _Auto Indent', None, 'Toggle automatic auto indentation of text',
+                 self.auto_indent_toggled_cb),
+                ('InsertSpaces', None, 'Insert _Spaces Instead of Tabs', None,
+                 'Whether to insert space characters when inserting tabulations', self.insert_spaces_toggled_cb)
+            ]
+        else:
+            self._toggle_actions = []
+
+    def get_view_ui_description(self):
+        """
+        The XML description of the menu bar for the UI manager
+
+        It only depends on the toolkit in use, so it is built once and shared by all dialogs.
+        :return: The UI description string
+        """
+        global _VIEW_UI_DESCRIPTION
+        if _VIEW_UI_DESCRIPTION is None:
+            font_size = "\n".join(
+                ['<menuitem action=\'%s\'/>' % action for (action, _, _, _, _, _) in self._font_size_actions])
+
+            gtksourceview_ui_additions = "" if TOOLKIT == GTK else """
+              <menuitem action='ShowNumbers'/>
+              <menuitem action='AutoIndent'/>
+              <menuitem action='InsertSpaces'/>
+              <menu action='TabsWidth'>
+                %s
+              </menu>
+              """ % "\n".join(['<menuitem action=\'%s\'/>' % action for (action, _, _, _, _, _) in self._tabs_width_actions])
+
+            new_node_content = "\n".join(
+                ['<menuitem action=\'%s\'/>' % action for (action, _, _, _, _, _) in self._new_node_content_actions])
+
+            close_shortcut = "\n".join(
+                ['<menuitem action=\'%s\'/>' % action for (action, _, _, _, _, _) in self._close_shortcut_actions])
+
+            _VIEW_UI_DESCRIPTION = """
+            <ui>
+              <menubar name='MainMenu'>
+                <menu action='FileMenu'>
+                  <menuitem action='Open'/>
+                </menu>
+                <menu action='ViewMenu'>
+                  <menu action='FontSize'>
+                    {font_size}
+                  </menu>
+                  <menuitem action='WordWrap'/>
+                  {additions}
+                  <menuitem action='WhitePreviewBackground'/>
+                </menu>
+                <menu action='SettingsMenu'>
+                  <menu action='NewNodeContent'>
+                    {new_node_content}
+                  </menu>
+                  <menu action='CloseShortcut'>
+                    {close_shortcut} 
+                  </menu>
+                  <menuitem action='ConfirmClose'/>
+                </menu>
+              </menubar>
+            </ui>
+            """.format(additions=gtksourceview_ui_additions, font_size=font_size,
+                       new_node_content=new_node_content, close_shortcut=close_shortcut)
+        return _VIEW_UI_DESCRIPTION
+
+    def open_file_cb(self, _, text_buffer):
+        """
+        Present file chooser to select a source code file
+
+        The chooser is created on first use and only hidden afterwards, so it is reused when
+        the user opens another file.
+        :param text_buffer: The target text buffer to show the loaded text in
+        """
+        chooser = self._file_chooser
+        if chooser is None:
+            chooser = self._file_chooser = Gtk.FileChooserDialog('Open file...', self._window,
+                                                                 Gtk.FileChooserAction.OPEN,
+                                                                 (Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL,
+                                                                  Gtk.STOCK_OPEN, Gtk.ResponseType.OK))
+            chooser.set_destroy_with_parent(True)
+        response = chooser.run()
+        chooser.hide()
+        if response == Gtk.ResponseType.OK:
+            filename = chooser.get_filename()
+            if filename and not AskTextGTKSource.open_file(text_buffer, filename):
+                dlg = Gtk.MessageDialog(self._window, Gtk.DialogFlags.MODAL, Gtk.MessageType.ERROR,
+                                        Gtk.ButtonsType.OK)
+                dlg.set_markup("<b>Couldn't load file</b>")
+                dlg.format_secondary_text("{0}\n\nMake sure that the file is readable and "
+                                          "UTF-8 encoded.".format(filename))
+                dlg.run()
+                dlg.destroy()
+
+    @staticmethod
+    def update_position_label(text_buffer, asktext, view):
+        """
+        Update the position label below the source code view
+        :param (AskTextGTKSource) asktext:
+        :param text_buffer:
+        :param view:
+        """
+        iterator = text_buffer.get_iter_at_mark(text_buffer.get_insert())
+        nchars = iterator.get_offset()
+        row = iterator.get_line() + 1
+        start = iterator.copy()
+        start.set_line_offset(0)
+        col = 0
+
+        if TOOLKIT == GTKSOURCEVIEW:
+            # Fetch the line up to the cursor at once instead of walking it char by char in GTK
+            line_text = text_buffer.get_slice(start, iterator, True)
+            if '\t' not in line_text:
+                col = len(line_text)
+            else:
+                tabwidth = view.get_tab_width()
+                for char in line_text:
+                    if char == '\t':
+                        col += tabwidth - col % tabwidth
+                    else:
+                        col += 1
+            asktext.pos_label.set_text('char: %d, line: %d, column: %d' % (nchars, row, col + 1))
+        else:
+            asktext.pos_label.set_text('char: %d, line: %d' % (nchars, row))
+
+    @staticmethod
+    def load_file(text_buffer, path):
+        """
+        Load text from a file into a text buffer
+        :param text_buffer: the GTK text buffer
+        :param path: where to load the file from
+        :returns: True, if successful
+        """
+
+        try:
+            with open(path, "rb") as file_handle:
+                # Binary mode does not translate line endings, \r would end up in the node and the tex file
+                text = file_handle.read().decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+        except (IOError, UnicodeDecodeError):
+            return False
+        text_buffer.begin_user_action()
+        text_buffer.set_text(text)
+        text_buffer.end_user_action()
+
+        text_buffer.set_modified(True)
+        text_buffer.place_cursor(text_buffer.get_start_iter())
+        return True
+
+    @staticmethod
+    def open_file(text_buffer, filename):
+        """
+        Open a text file via its name
+        :param text_buffer: Where to put the loaded text
+        :param filename: File name
+        :returns: True, if successful
+        """
+
+        if os.path.isabs(filename):
+            path = filename
+        else:
+            path = os.path.abspath(filename)
+
+        return AskTextGTKSource.load_file(text_buffer, path)
+
+    # Callback methods for the various menu items at the top of the window
+    def numbers_toggled_cb(self, action, sourceview):
+        active = self._gui_config["line_numbers"] = action.get_active()
+        sourceview.set_show_line_numbers(active)
+
+    def auto_indent_toggled_cb(self, action, sourceview):
+        active = self._gui_config["auto_indent"] = action.get_active()
+        sourceview.set_auto_indent(active)
+
+    def insert_spaces_toggled_cb(self, action, sourceview):
+        active = self._gui_config["insert_spaces"] = action.get_active()
+        sourceview.set_insert_spaces_instead_of_tabs(active)
+
+    def word_wrap_toggled_cb(self, action, sourceview):
+        active = self._gui_config["word_wrap"] = action.get_active()
+        sourceview.set_wrap_mode(_WRAP_WORD if active else _WRAP_NONE)
+
+    def on_preview_background_chagned(self, action, sourceview):
+        self._gui_config["white_preview_background"] = action.get_active()
+
+    def tabs_toggled_cb(self, action, previous_value, sourceview):
+        tab_width = self._gui_config["tab_width"] = action.get_current_value()
+        sourceview.set_tab_width(tab_width)
+
+    def new_node_content_cb(self, action, previous_value, sourceview):
+        self._gui_config["new_node_content"] = self.NEW_NODE_CONTENT[action.get_current_value()]
+
+    def font_size_cb(self, action, previous_value, sourceview):
+        font_size = self._gui_config["font_size"] = self.FONT_SIZE[action.get_current_value()]
+        set_monospace_font(sourceview, font_size)
+
+    def close_shortcut_cb(self, action, previous_value, sourceview):
+        index = action.get_current_value()
+        self._close_shortcut = self._gui_config["close_shortcut"] = self.CLOSE_SHORTCUT[index]
+        self._cancel_button.set_tooltip_text(self._close_shortcut_tooltips[index])
+
+    def confirm_close_toggled_cb(self, action, sourceview):
+        self._gui_config["confirm_close"] = action.get_active()
+
+    def cb_key_press(self, widget, event, data=None):
+        """
+        Handle keyboard shortcuts
+        :param widget:
+        :param event:
+        :param data:
+        :return: True, if a shortcut was recognized and handled
+        """
+
+        key_name = _keyval_name(event.keyval)
+        ctrl_is_pressed = _CONTROL_MASK & event.state
+        if key_name == 'Return' and ctrl_is_pressed:
+            self._ok_button.clicked()
+            return True
+
+        # Show/ update Preview shortcut (CTRL+P)
+        if key_name == 'p' and ctrl_is_pressed:
+            self._preview_button.clicked()
+            return True
+
+        # Cancel dialog via shortcut if set by the user
+        if (self._close_shortcut == 'Escape' and key_name == 'Escape') or \
+           (self._close_shortcut == 'CtrlQ' and key_name == 'q' and ctrl_is_pressed):
+            self._cancel_button.clicked()
+            return True
+
+        return False
+
+    def get_source_text(self):
+        """
+        The LaTeX code entered in the editor
+
+        The text is only fetched from the text buffer if it has changed since the last call.
+        :return: The content of the text buffer
+        """
+        if self._source_text is None:
+            start, end = self._source_buffer.get_bounds()
+            self._source_text = self._source_buffer.get_text(start, end, True)
+        return self._source_text
+
+    def get_preamble_file(self):
+        """
+        :return: The preamble file selected in the preamble widget, an empty string if none is selected
+        """
+        return self._preamble_getter() or ""
+
+    def cb_ok(self, widget=None, data=None):
+        self.text = self.get_source_text()
+        self.preamble_file = self.get_preamble_file()
+
+        self.global_scale_factor = self._scale_adj.get_value()
+
+        self.current_convert_strokes_to_path = self._conv_stroke2path.get_active()
+
+        try:
+            self.callback(self.text, self.preamble_file, self.global_scale_factor,
+                          self.ALIGNMENT_LABELS[self._alignment_combobox.get_active()],
+                          self.TEX_COMMANDS[self._texcmd_cbox.get_active()].lower(),
+                          self.current_convert_strokes_to_path)
+        except Exception as error:
+            self.show_error_dialog("TexText Error",
+                                   "Error occurred while converting text from Latex to SVG:",
+                                   error)
+            return False
+
+        Gtk.main_quit()
+        return False
+
+    def cb_cancel(self, widget=None, data=None):
+        """Callback for Cancel button"""
+        self.window_deleted_cb(widget, None, None)
+
+    def cb_compiler_changed(self, combo_box):
+        using_tex = self.TEX_COMMANDS[self._texcmd_cbox.get_active()] != "typst"
+        self._preview_button.set_sensitive(using_tex)
+        self._preamble_widget.set_sensitive(using_tex)
+        self._preamble_delete_btn.set_sensitive(using_tex)
+
+    def text_changed_cb(self, text_buffer):
+        self._source_text = None
+
+    def move_cursor_cb(self, text_buffer, cursoriter, mark, view):
+        self.update_position_label(text_buffer, self, view)
+
+    def window_deleted_cb(self, widget, event, view):
+        if (self._gui_config.get("confirm_close", self.DEFAULT_CONFIRM_CLOSE)
+                and self.get_source_text() != self.text):
+            dlg = Gtk.MessageDialog(self._window, Gtk.DialogFlags.MODAL, Gtk.MessageType.QUESTION, Gtk.ButtonsType.NONE)
+            dlg.set_markup(
+                "<b>Do you want to close TexText without save?</b>\n\n"
+                "Your changes will be lost if you don't save them."
+            )
+            dlg.add_button("Continue editing", Gtk.ResponseType.CLOSE) \
+                .set_image(Gtk.Image.new_from_stock(Gtk.STOCK_GO_BACK, Gtk.IconSize.BUTTON))
+            dlg.add_button("Close without save", Gtk.ResponseType.YES) \
+                .set_image(Gtk.Image.new_from_stock(Gtk.STOCK_CLOSE, Gtk.IconSize.BUTTON))
+
+            dlg.set_title("Close without save?")
+            res = dlg.run()
+            dlg.destroy()
+            if res in (Gtk.ResponseType.CLOSE, Gtk.ResponseType.DELETE_EVENT):
+                return True
+
+        Gtk.main_quit()
+        return False
+
+    def update_preview(self, widget):
+        """Update the preview image of the GUI using the callback it gave """
+        if self._preview_callback:
+            try:
+                self._preview_callback(self.get_source_text(), self.get_preamble_file(), self.set_preview_image_from_file,
+                                       self.TEX_COMMANDS[self._texcmd_cbox.get_active()].lower(),
+                                       self._gui_config.get("white_preview_background", self.DEFAULT_PREVIEW_WHITE_BACKGROUND))
+            except Exception as error:
+                self.show_error_dialog("TexText Error",
+                                       "Error occurred while generating preview:",
+                                        error)
+                return False
+
+    def set_preview_image_from_file(self, path):
+        """
+        Set the preview image in the GUI, scaled to the text view's width
+        :param path: the path of the image
+        """
+
+        self._pixbuf = GdkPixbuf.Pixbuf.new_from_file(path)
+        self._scaled_pixbuf = (None, None)
+        self._preview_scroll_window.set_has_tooltip(False)
+        self.update_preview_representation()
+
+    def switch_preview_representation(self, widget=None, event=None):
+        if event.button == 1: # left click only
+            if event.type == _DOUBLE_CLICK:  # only double click
+                if self.preview_representation == "SCALE":
+                    if self._preview_scroll_window.get_has_tooltip():
+                        self.preview_representation = "SCROLL"
+                else:
+                    if self._preview_scroll_window.get_has_tooltip():
+                        self.preview_representation = "SCALE"
+                self.update_preview_representation()
+
+    def update_preview_representation(self):
+
+        max_preview_height = 150
+
+        textview_width = self._source_view.get_allocation().width
+        image_width = self._pixbuf.get_width()
+        image_height = self._pixbuf.get_height()
+
+        def set_scaled_preview():
+            # Ratios >= 1 mean the image already fits in that direction and never win against 1.0
+            scale = min(1.0, textview_width / float(image_width), max_preview_height / float(image_height))
+
+            pixbuf = self._pixbuf
+            if scale != 1:
+                # Switching between the representations reuses the scaled copy as long as the size is the same
+                scaled_size = (int(image_width * scale), int(image_height * scale))
+                if self._scaled_pixbuf[0] != scaled_size:
+                    self._scaled_pixbuf = (scaled_size, self._pixbuf.scale_simple(scaled_size[0], scaled_size[1],
+                                                                                 _BILINEAR))
+                pixbuf = self._scaled_pixbuf[1]
+                self._preview_scroll_window.set_tooltip_text("Double click: scale to original size")
+
+            self._preview.set_from_pixbuf(pixbuf)
+            self._preview.set_size_request(pixbuf.get_width(), pixbuf.get_height())
+
+            return image_height
+
+        def set_scroll_preview():
+
+            self._preview.set_size_request(image_width, image_height)
+
+            scroll_bar_width = 30
+
+            desired_preview_area_height = image_height
+            if image_width + scroll_bar_width >= textview_width:
+                desired_preview_area_height += scroll_bar_width
+
+            if desired_preview_area_height>max_preview_height or image_width > textview_width:
+                self._preview_scroll_window.set_tooltip_text("Double click: scale to fit window")
+
+            self._preview.set_from_pixbuf(self._pixbuf)
+            self._preview.set_size_request(image_width, image_height)
+            return desired_preview_area_height
+
+        if self.preview_representation == "SCROLL":
+            desired_preview_area_height = set_scroll_preview()
+        else:
+            desired_preview_area_height = set_scaled_preview()
+
+        self._preview_scroll_window.set_size_request(-1, min(desired_preview_area_height, max_preview_height))
+        self._preview_scroll_window.show()
+
+    # ---------- create view window
+    def create_buttons(self):
+        """Creates and connects the Save, Cancel and Preview buttons"""
+
+        spacing = 0
+
+        button_box = Gtk.HButtonBox()
+
+        button_box.set_border_width(5)
+        button_box.set_layout(Gtk.ButtonBoxStyle.EDGE)
+        button_box.set_spacing(spacing)
+
+        self._cancel_button = Gtk.Button(stock=Gtk.STOCK_CANCEL)
+        self._cancel_button.set_tooltip_text("Don't save changes (ESC)")
+        button_box.add(self._cancel_button)
+
+        self._preview_button = Gtk.Button(label="Preview")
+        self._preview_button.set_tooltip_text("Show/ update preview (CTRL+P)")
+        button_box.add(self._preview_button)
+
+        self._ok_button = Gtk.Button(stock=Gtk.STOCK_SAVE)
+        self._ok_button.set_tooltip_text("Update or create new LaTeX output (CTRL+RETURN)")
+        button_box.add(self._ok_button)
+
+        self._cancel_button.connect("clicked", self.cb_cancel)
+        self._ok_button.connect("clicked", self.cb_ok)
+        self._preview_button.connect('clicked', self.update_preview)
+
+        self._texcmd_cbox.connect("changed", self.cb_compiler_changed)
+        self.cb_compiler_changed(self._texcmd_cbox)
+
+        return button_box
+
+    def clear_preamble(self, _=None):
+        """
+        Clear the preamble file setting
+        """
+        self.preamble_file = "default_packages.tex"
+        self.set_preamble()
+
+    def set_preamble(self):
+        self._preamble_setter(self.preamble_file)
+
+    def reset_scale_factor(self, _=None):
+        self._scale_adj.set_value(self.current_scale_factor)
+
+    def use_global_scale_factor(self, _=None):
+        self._scale_adj.set_value(self.global_scale_factor)
+
+    # ---------- Create main window
+    def create_window(self):
+        """
+        Set up the window with all its widgets
+
+        :return: the created window
+        """
+        window = Gtk.Window()
+        window.type = Gtk.WindowType.TOPLEVEL
+        window.set_border_width(2)
+        window.set_title('Enter LaTeX Formula - TexText {0}'.format(self.textext_version))
+
+        # File chooser and Scale Adjustment
+        if _HAS_FILE_CHOOSER_BUTTON:
+            self._preamble_widget = Gtk.FileChooserButton("...")
+            self._preamble_widget.set_action(Gtk.FileChooserAction.OPEN)
+            self._preamble_getter = self._preamble_widget.get_filename
+            self._preamble_setter = self._preamble_widget.set_filename
+        else:
+            self._preamble_widget = Gtk.Entry()
+            self._preamble_getter = self._preamble_widget.get_text
+            self._preamble_setter = self._preamble_widget.set_text
+
+        self.set_preamble()
+
+        # --- Preamble file ---
+        self._preamble_delete_btn = Gtk.Button(label="Clear")
+        self._preamble_delete_btn.connect('clicked', self.clear_preamble)
+        self._preamble_delete_btn.set_tooltip_text("Clear the preamble file setting")
+
+        preamble_frame = Gtk.Frame()
+        preamble_frame.set_label("Preamble File")
+        preamble_box = Gtk.HBox(homogeneous=False, spacing=0)
+        preamble_frame.add(preamble_box)
+        preamble_box.pack_start(self._preamble_widget, True, True, 5)
+        preamble_box.pack_start(self._preamble_delete_btn, False, False, 5)
+        preamble_box.set_border_width(3)
+
+        # --- Tex command ---
+        texcmd_frame = Gtk.Frame()
+        texcmd_frame.set_label("TeX command")
+        texcmd_box = Gtk.HBox(homogeneous=False, spacing=0)
+        texcmd_frame.add(texcmd_box)
+        texcmd_box.set_border_width(3)
+
+        tex_command_store = Gtk.ListStore(str)
+        for tex_command in self.TEX_COMMANDS:
+            tex_command_store.append([tex_command])
+
+        self._texcmd_cbox = Gtk.ComboBox.new_with_model(tex_command_store)
+        renderer_text = Gtk.CellRendererText()
+        self._texcmd_cbox.pack_start(renderer_text, True)
+        self._texcmd_cbox.add_attribute(renderer_text, "text", 0)
+
+        self._texcmd_cbox.set_active(self.TEX_COMMANDS.index(self.current_texcmd))
+        self._texcmd_cbox.set_tooltip_text("TeX command used for compiling.")
+        texcmd_box.pack_start(self._texcmd_cbox, True, True, 5)
+
+        # --- Scaling ---
+        scale_frame = Gtk.Frame()
+        scale_frame.set_label("Scale Factor")
+        scale_box = Gtk.HBox(homogeneous=False, spacing=0)
+        scale_box.set_border_width(3)
+        scale_frame.add(scale_box)
+        self._scale_adj = Gtk.Adjustment(lower=0.001, upper=180, step_incr=0.001, page_incr=1)
+        self._scale = Gtk.SpinButton()
+        self._scale.set_adjustment(self._scale_adj)
+        self._scale.set_digits(3)
+        self._scale_adj.set_value(self.scale_factor_after_loading())
+        self._scale.set_tooltip_text("Change the scale of the LaTeX output")
+
+        # We need buttons with custom labels and stock icons, so we make some
+        scale_reset_button = Gtk.Button.new_from_icon_name('edit-undo', Gtk.IconSize.BUTTON)
+        scale_reset_button.set_label(self._reset_label)
+        scale_reset_button.set_always_show_image(True)
+        scale_reset_button.set_tooltip_text(self._reset_tooltip)
+        scale_reset_button.connect('clicked', self.reset_scale_factor)
+        if self.text == "":
+            scale_reset_button.set_sensitive(False)
+
+        scale_global_button = Gtk.Button.new_from_icon_name('edit-copy', Gtk.IconSize.BUTTON)
+        scale_global_button.set_label(self._global_label)
+        scale_global_button.set_always_show_image(True)
+        scale_global_button.set_tooltip_text(self._global_tooltip)
+        scale_global_button.connect('clicked', self.use_global_scale_factor)
+
+        scale_box.pack_start(self._scale, True, True, 2)
+        scale_box.pack_start(scale_reset_button, False, False, 2)
+        scale_box.pack_start(scale_global_button, False, False, 2)
+
+        # --- Alignment box ---
+        alignment_frame = Gtk.Frame()
+        alignment_frame.set_label("Alignment")
+        alignment_box = Gtk.HBox(homogeneous=False, spacing=0)
+        alignment_box.set_border_width(3)
+        alignment_frame.add(alignment_box)
+
+        liststore = Gtk.ListStore(GdkPixbuf.Pixbuf)
+        for icon in get_alignment_icons():
+            liststore.append([icon])
+
+        self._alignment_combobox = Gtk.ComboBox()
+
+        cell = Gtk.CellRendererPixbuf()
+        self._alignment_combobox.pack_start(cell, True)
+        self._alignment_combobox.add_attribute(cell, 'pixbuf', 0)
+        self._alignment_combobox.set_model(liststore)
+        self._alignment_combobox.set_wrap_width(3)
+        self._alignment_combobox.set_active(self.ALIGNMENT_INDEX[self.current_alignment])
+        self._alignment_combobox.set_tooltip_text("Set alignment anchor position")
+        if self.text == "":
+            self._alignment_combobox.set_sensitive(False)
+
+        alignment_box.pack_start(self._alignment_combobox, True, True, 2)
+
+        # Advanced settings
+        adv_settings_frame = Gtk.Frame()
+        adv_settings_frame.set_label("SVG output")
+        self._conv_stroke2path = Gtk.CheckButton(label="No strokes")
+        self._conv_stroke2path.set_tooltip_text("Ensures that strokes (lines, e.g. in \\sqrt, \\frac) can be easily \ncolored in Inkscape (Time consuming compilation!)")
+        self._conv_stroke2path.set_active(self.current_convert_strokes_to_path)
+        adv_settings_frame.add(self._conv_stroke2path)
+
+        # --- Scale, alignment and advanced settings together in one "line"
+        scale_align_hbox = Gtk.HBox(homogeneous=False, spacing=0)
+        scale_align_hbox.pack_start(scale_frame, False, False, 5)
+        scale_align_hbox.pack_start(alignment_frame, True, True, 5)
+        scale_align_hbox.pack_start(adv_settings_frame, True, True, 5)
+
+        # --- TeX code window ---
+        # Scrolling Window with Source View inside
+        scroll_window = Gtk.ScrolledWindow()
+        scroll_window.set_shadow_type(Gtk.ShadowType.IN)
+
+        if TOOLKIT == GTKSOURCEVIEW:
+            # Source code view
+            text_buffer = GtkSource.Buffer()
+
+            # set LaTeX as highlighting language, so that pasted text is also highlighted as such
+            lang_manager = GtkSource.LanguageManager()
+            latex_language = lang_manager.get_language("latex")
+            text_buffer.set_language(latex_language)
+
+            source_view = GtkSource.View.new_with_buffer(text_buffer)
+        else:
+            # normal text view
+            text_buffer = Gtk.TextBuffer()
+            source_view = Gtk.TextView()
+            source_view.set_buffer(text_buffer)
+
+        self._source_buffer = text_buffer
+        self._source_view = source_view
+        self._source_buffer.set_text(self.text)
+        self._source_view.set_size_request(-1, 150)
+
+        scroll_window.add(self._source_view)
+        set_monospace_font(self._source_view, self.DEFAULT_FONTSIZE)
+
+        # Action group and UI manager
+        ui_manager = Gtk.UIManager()
+        accel_group = ui_manager.get_accel_group()
+        window.add_accel_group(accel_group)
+        ui_manager.add_ui_from_string(self.get_view_ui_description())
+
+        action_group = Gtk.ActionGroup('ViewActions')
+        action_group.add_actions(self._view_actions, source_view)
+        action_group.add_actions(self.buffer_actions, text_buffer)
+        action_group.add_radio_actions(self._new_node_content_actions, -1, self.new_node_content_cb, source_view)
+        action_group.add_radio_actions(self._close_shortcut_actions, -1, self.close_shortcut_cb, source_view)
+        action_group.add_radio_actions(self._font_size_actions, -1, self.font_size_cb, source_view)
+        action_group.add_toggle_actions(self._confirm_close_action, source_view)
+        action_group.add_toggle_actions(self._word_wrap_action, source_view)
+        action_group.add_toggle_actions(self._preview_white_background_action, source_view)
+        if TOOLKIT == GTKSOURCEVIEW:
+            action_group.add_toggle_actions(self._toggle_actions, source_view)
+            action_group.add_radio_actions(self._tabs_width_actions, -1, self.tabs_toggled_cb, source_view)
+        ui_manager.insert_action_group(action_group, 0)
+
+        # Menu
+        menu = ui_manager.get_widget('/MainMenu')
+
+        # Cursor position label
+        self.pos_label = Gtk.Label()
+        self.pos_label.set_text('Position')
+
+        # latex preview
+        self._preview = Gtk.Image()
+        self._preview_scroll_window = Gtk.ScrolledWindow()
+        self._preview_scroll_window.set_shadow_type(Gtk.ShadowType.NONE)
+        self._preview_scroll_window.set_policy(Gtk.PolicyType.AUTOMATIC, Gtk.PolicyType.AUTOMATIC)
+        preview_viewport = Gtk.Viewport()
+        preview_viewport.set_shadow_type(Gtk.ShadowType.NONE)
+        preview_viewport.add(self._preview)
+        self._preview_scroll_window.add(preview_viewport)
+
+        preview_event_box = Gtk.EventBox()
+        preview_event_box.add_events(Gdk.EventMask.BUTTON_PRESS_MASK)
+
+        preview_event_box.connect('button-press-event', self.switch_preview_representation)
+        preview_event_box.add(self._preview_scroll_window)
+
+        # Vertical Layout
+        vbox = Gtk.VBox(False, 4)
+        window.add(vbox)
+
+        vbox.pack_start(menu, False, False, 0)
+
+        hbox_texcmd_preamble = Gtk.HBox(True, 0)
+
+        hbox_texcmd_preamble.pack_start(texcmd_frame, True, True, 5)
+        hbox_texcmd_preamble.pack_start(preamble_frame, True, True, 5)
+
+        vbox.pack_start(hbox_texcmd_preamble, False, False, 0)
+        vbox.pack_start(scale_align_hbox, False, False, 0)
+
+        vbox.pack_start(scroll_window, True, True, 0)
+        vbox.pack_start(self.pos_label, False, False, 0)
+        vbox.pack_start(preview_event_box, False, False, 0)
+        buttons_row = self.create_buttons()
+        vbox.pack_start(buttons_row, False, False, 0)
+
+        vbox.show_all()
+
+        # ToDo: Currently this seems to do nothing?
+        self._same_height_objects = [
+            preamble_frame,
+            texcmd_frame,
+            scale_align_hbox
+        ]
+
+        self._preview_scroll_window.hide()
+
+        # preselect menu check items, action_group is still the view action group inserted above
+        font_size_value = self._gui_config.get("font_size", self.DEFAULT_FONTSIZE)
+        new_node_content_value = self._gui_config.get("new_node_content", self.DEFAULT_NEW_NODE_CONTENT)
+        close_shortcut_value = self._gui_config.get("close_shortcut", self.DEFAULT_CLOSE_SHORTCUT)
+        active_actions = [
+            ('FontSize{}'.format(font_size_value), True),
+            ('WordWrap', self._gui_config.get("word_wrap", self.DEFAULT_WORDWRAP)),
+            ('NewNodeContent{}'.format(new_node_content_value), True),
+            ('CloseShortcut{}'.format(close_shortcut_value), True),
+            ('ConfirmClose', self._gui_config.get("confirm_close", self.DEFAULT_CONFIRM_CLOSE)),
+            ('WhitePreviewBackground', self._gui_config.get("white_preview_background",
+                                                            self.DEFAULT_PREVIEW_WHITE_BACKGROUND)),
+        ]
+        if TOOLKIT == GTKSOURCEVIEW:
+            tab_width = self._gui_config.get("tab_width", self.DEFAULT_TABWIDTH)
+            active_actions += [
+                ('ShowNumbers', self._gui_config.get("line_numbers", self.DEFAULT_SHOWLINENUMBERS)),
+                ('AutoIndent', self._gui_config.get("auto_indent", self.DEFAULT_AUTOINDENT)),
+                ('InsertSpaces', self._gui_config.get("insert_spaces", self.DEFAULT_INSERTSPACES)),
+                ('TabsWidth%d' % tab_width, True),
+            ]
+        for action_name, active in active_actions:
+            action_group.get_action(action_name).set_active(active)
+        if TOOLKIT == GTKSOURCEVIEW:
+            self._source_view.set_tab_width(tab_width)  # <- Why is this explicit call necessary ??
+
+        if self.text=="":
+            if new_node_content_value=='InlineMath':
+                self.text="$$"
+                self._source_buffer.set_text(self.text)
+                iter = self._source_buffer.get_iter_at_offset(1)
+                self._source_buffer.place_cursor(iter)
+            if new_node_content_value=='DisplayMath':
+                self.text = "$$$$"
+                self._source_buffer.set_text(self.text)
+                iter = self._source_buffer.get_iter_at_offset(2)
+                self._source_buffer.place_cursor(iter)
+
+        # Connect event callbacks
+        window.connect("key-press-event", self.cb_key_press)
+        text_buffer.connect('changed', self.text_changed_cb)
+        text_buffer.connect('changed', self.update_position_label, self, source_view)
+        window.connect('delete-event', self.window_deleted_cb, source_view)
+        text_buffer.connect('mark_set', self.move_cursor_cb, source_view)
+
+        # Decoding the icons is deferred until the main loop is idle, so it does not delay the first paint
+        def set_window_icons():
+            window.set_icon_list(get_window_icons())
+            return False  # Do not call again
+
+        GLib.idle_add(set_window_icons)
+
+        return window
+
+    def ask(self, callback, preview_callback=None):
+        with warnings.catch_warnings():
+            for warning_filter in _WARNING_FILTERS:
+                warnings.filterwarnings(**warning_filter)
+            self.callback = callback
+            self._preview_callback = preview_callback
+
+            # create first window
+            with SuppressStream():  # suppress GTK Warings printed directly to stderr in C++
+                window = self.create_window()
+            window.set_default_size(500, 525)
+            # Until commit 802d295e46877fd58842b61dbea4276372a2505d we called own normalize_ui_row_heights here with
+            # bad hide/show/hide hack, see issue #114
+            window.show()
+            self._window = window
+            self._window.set_focus(self._source_view)
+
+            # main loop
+            Gtk.main()
+            return self._gui_config
+
+    def show_error_dialog(self, title, message_text, exception):
+        from .errors import TexTextCommandFailed
+
+        dialog = Gtk.Dialog(title, self._window)
+        dialog.set_default_size(450, 300)
+        button = dialog.add_button(Gtk.STOCK_OK, Gtk.ResponseType.CLOSE)
+        button.connect("clicked", lambda w, d=None: dialog.destroy())
+        message_label = Gtk.Label()
+        message_label.set_markup("<b>{message}</b>".format(message=message_text))
+        message_label.set_justify(Gtk.Justification.LEFT )
+
+        raw_output_box = Gtk.VBox()
+
+        def add_section(header, text_producer):
+            """
+            Add a text section to the dialog
+            :param header: Label of the expander, None for a section which is always shown
+            :param text_producer: Callable returning the text of the section. For expander sections
+                                  it is called and the text view is built when the section is expanded
+                                  for the first time.
+            """
+
+            def build_scroll_window():
+                text_view = Gtk.TextView()
+                text_view.set_editable(False)
+                text_view.set_left_margin(5)
+                text_view.set_right_margin(5)
+                text_view.set_wrap_mode(Gtk.WrapMode.WORD)
+                text_view.get_buffer().set_text(text_producer())
+                text_view.show()
+
+                scroll_window = Gtk.ScrolledWindow()
+                scroll_window.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.ALWAYS)
+                scroll_window.set_shadow_type(Gtk.ShadowType.IN)
+                scroll_window.set_min_content_height(150)
+                scroll_window.add(text_view)
+                scroll_window.show()
+                return scroll_window
+
+            if header is None:
+                dialog.vbox.pack_start(build_scroll_window(), expand=True, fill=True, padding=5)
+                return
+
+            expander = Gtk.Expander()
+
+            def callback(event):
+                if expander.get_expanded():
+                    desired_height = 20
+                else:
+                    desired_height = 150
+                    if expander.get_child() is None:
+                        expander.add(build_scroll_window())
+                expander.set_size_request(-1, desired_height)
+
+            expander.connect('activate', callback)
+            expander.show()
+
+            expander.set_label(header)
+            expander.set_use_markup(True)
+
+            expander.set_size_request(20, -1)
+
+            dialog.vbox.pack_start(expander, expand=True, fill=True, padding=5)
+
+        dialog.vbox.pack_start(message_label, expand=False, fill=True, padding=5)
+        add_section(None, lambda: str(exception))
+        dialog.vbox.pack_start(raw_output_box, expand=False, fill=True, padding=5)
+
+        if isinstance(exception, TexTextCommandFailed):
+            if exception.stdout:
+                add_section("Stdout: <small><i>(click to expand)</i></small>",
+                            lambda: decode_process_output(exception.stdout))
+            if exception.stderr:
+                add_section("Stderr: <small><i>(click to expand)</i></small>",
+                            lambda: decode_process_output(exception.stderr))
+        dialog.show_all()
+        dialog.run()
@@ -0,0 +1,331 @@
+"""
+This file is part of TexText, an extension for the vector
+illustration program Inkscape.
+
+Copyright (c) 2006-2023 TexText developers.
+
+TexText is released under the 3-Clause BSD license. See
+file LICENSE.txt or go to https://github.com/textext/textext
+for full license details.
+
+The TkInter dialog of TexText, see asktext.py. This module is only
+imported when GTK is not available.
+"""
+
+import os
+from .asktext import AskText, import_gui_toolkit, decode_process_output
+
+# Ensure that the bindings have been imported before fetching them from asktext
+import_gui_toolkit()
+from .asktext import Tk, TkMsgBoxes, TkFileDialogs
+
+
+class AskTextTK(AskText):
+    """TK GUI for editing TexText objects"""
+
+    # Screen size, queried from Tk only once per process
+    _screen_width = None
+    _screen_height = None
+
+    def __init__(self, version_str, text, preamble_file, global_scale_factor, current_scale_factor, current_alignment,
+                 current_texcmd, current_convert_strokes_to_path, tex_commands, gui_config):
+        super(AskTextTK, self).__init__(version_str, text, preamble_file, global_scale_factor, current_scale_factor,
+                                        current_alignment, current_texcmd, current_convert_strokes_to_path, tex_commands, gui_config)
+        self._frame = None
+        self._scale = None
+        self._preamble = None
+        self._askfilename_button = None
+        self._text_box = None
+        self._text_modified = False
+
+    @staticmethod
+    def cb_cancel(widget=None, data=None):
+        """Callback for Cancel button"""
+        raise SystemExit(1)
+
+    @staticmethod
+    def validate_spinbox_input(d, i, P, s, S, v, V, W):
+        """ Ensure that only floating point numbers are accepted as input of a Tk widget
+            Inspired from:
+            https://stackoverflow.com/questions/4140437/interactively-validating-entry-widget-content-in-tkinter
+
+            S -> string coming from user, s -> current string in the box, P -> resulting string in the box
+            d -> Command (insert = 1, delete = 0), i -> Index position of cursor
+            Note: Selecting an entry and copying something from the clipboard is rejected by this method. Reason:
+            Without validation Tk appends the content of the clipboard at the end of the selection leading to
+            invalid content. So with or without this validation method you need to delete the content of the
+            box before inserting the new stuff.
+        """
+        if S == '' or P == '':
+            # Initialization of widget (S=='') and deletion of entry (P=='')
+            valid = True
+        elif S.strip("0123456789.eE+-"):
+            # Inserted text contains characters which never form a float, no need to parse it
+            valid = False
+        else:
+            # All other cases: Ensure that result is OK
+            try:
+                float(P)
+                valid = True
+            except ValueError:
+                valid = False
+        return valid
+
+    def ask(self, callback, preview_callback=None):
+        self.callback = callback
+
+        self._root = Tk.Tk()
+        # Keep the window hidden while the widgets are created, it is shown when the layout is complete
+        self._root.withdraw()
+        self._root.title("TexText {0}".format(self.textext_version))
+
+        self._frame = Tk.Frame(self._root)
+        self._frame.pack()
+
+        # Frame box for preamble file
+        box = Tk.Frame(self._frame, relief="groove", borderwidth=2)
+        label = Tk.Label(box, text="Preamble file:")
+        label.pack(pady=2, padx=5, anchor="w")
+        self._preamble = Tk.Entry(box)
+        self._preamble.pack(expand=True, fill="x", ipady=4, pady=5, padx=5, side="left", anchor="e")
+        self._preamble.insert(Tk.END, self.preamble_file)
+
+        self._askfilename_button = Tk.Button(box, text="Select...",
+                                       command=self.select_preamble_file)
+        self._askfilename_button.pack(ipadx=10, ipady=4, pady=5, padx=5, side="left")
+
+        box.pack(fill="x", pady=0, expand=True)
+
+        # Frame holding the advanced settings and the tex command
+        box2 = Tk.Frame(self._frame, relief="flat")
+        box2.pack(fill="x", pady=5, expand=True)
+
+        # Frame box for advanced settings
+        self._convert_strokes_to_path = Tk.BooleanVar()
+        self._convert_strokes_to_path.set(self.current_convert_strokes_to_path)
+        box = Tk.Frame(box2, relief="groove", borderwidth=2)
+        label = Tk.Label(box, text="SVG-output:")
+        label.pack(pady=2, padx=5, anchor="w")
+        Tk.Checkbutton(box, text="No strokes", variable=self._convert_strokes_to_path, onvalue=True, offvalue=False).pack(side="left", expand=False, anchor="w")
+        box.pack(side=Tk.RIGHT, fill="x", pady=5, expand=True)
+
+        # Frame box for tex command
+        self._tex_command_tk_str = Tk.StringVar()
+        self._tex_command_tk_str.set(self.current_texcmd)
+        box = Tk.Frame(box2, relief="groove", borderwidth=2)
+        label = Tk.Label(box, text="TeX command:")
+        label.pack(pady=2, padx=5, anchor="w")
+        Tk.OptionMenu(box, self._tex_command_tk_str, *self.TEX_COMMANDS,
+                      command=self.on_texcmd_change).pack(side="left", expand=False, anchor="w")
+        box.pack(side=Tk.RIGHT, fill="x", pady=5, expand=True)
+
+
+        # Frame box for scale factor and reset buttons
+        box = Tk.Frame(self._frame, relief="groove", borderwidth=2)
+        label = Tk.Label(box, text="Scale factor:")
+        label.pack(pady=2, padx=5, anchor="w")
+
+        validation_command = (self._root.register(self.validate_spinbox_input),
+                              '%d', '%i', '%P', '%s', '%S', '%v', '%V', '%W')
+        self._scale = Tk.Spinbox(box, from_=0.001, to=10, increment=0.001, validate="key",
+                                 validatecommand=validation_command)
+        self._scale.pack(expand=True, fill="x", ipady=4, pady=5, padx=5, side="left", anchor="e")
+        self._scale.delete(0, "end")
+        self._scale.insert(0, self.scale_factor_after_loading())
+
+        self._reset_button = Tk.Button(box, text=self._reset_label, command=self.reset_scale_factor)
+        self._reset_button.pack(ipadx=10, ipady=4, pady=5, padx=5, side="left")
+        if self.text == "":
+            self._reset_button.config(state=Tk.DISABLED)
+
+        self._global_button = Tk.Button(box, text=self._global_label, command=self.use_global_scale_factor)
+        self._global_button.pack(ipadx=10, ipady=4, pady=5, padx=5, side="left")
+
+        box.pack(fill="x", pady=5, expand=True)
+
+        # Alignment
+        box = Tk.Frame(self._frame, relief="groove", borderwidth=2)
+        label = Tk.Label(box, text="Alignment to existing node:")
+        label.pack(pady=2, padx=5, anchor="w")
+
+        self._alignment_tk_str = Tk.StringVar() # Does not work in ctor, and Tk.Tk() in front opens 2nd window
+        self._alignment_tk_str.set(self.current_alignment) # Variable holding the radio button selection
+
+        vbox = None
+        tk_state = Tk.DISABLED if self.text == "" else Tk.NORMAL
+        frame, radio_button = Tk.Frame, Tk.Radiobutton
+        radio_kw = {"variable": self._alignment_tk_str, "state": tk_state}
+        pack_kw = {"expand": True, "anchor": "w"}
+        for i, alignment_label in enumerate(self.ALIGNMENT_LABELS_COLMAJOR):
+            if i % 3 == 0:
+                vbox = frame(box)
+            radio_button(vbox, text=alignment_label, value=alignment_label, **radio_kw).pack(**pack_kw)
+            if (i + 1) % 3 == 0:
+                vbox.pack(side="left", fill="x", expand=True)
+        box.pack(fill="x")
+
+        # Word wrap status
+        self._word_wrap_tkval = Tk.BooleanVar()
+        self._word_wrap_tkval.set(self._gui_config.get("word_wrap", self.DEFAULT_WORDWRAP))
+
+        # Frame with text input field and word wrap checkbox
+        box = Tk.Frame(self._frame, relief="groove", borderwidth=2)
+        ibox = Tk.Frame(box)
+        label = Tk.Label(ibox, text="LaTeX code:")
+        self._word_wrap_checkbotton = Tk.Checkbutton(ibox, text="Word wrap", variable=self._word_wrap_tkval,
+                                                     onvalue=True, offvalue=False, command=self.cb_word_wrap)
+        label.pack(pady=0, padx=5, side = "left", anchor="w")
+        self._word_wrap_checkbotton.pack(pady=0, padx=5, side = "right", anchor="w")
+        ibox.pack(expand=True, fill="both", pady=0, padx=0)
+
+        ibox = Tk.Frame(box)
+        iibox = Tk.Frame(ibox)
+        self._text_box = Tk.Text(iibox, width=70, height=12) # 70 chars, 12 lines
+        hscrollbar = Tk.Scrollbar(iibox, orient=Tk.HORIZONTAL, command=self._text_box.xview)
+        self._text_box["xscrollcommand"]=hscrollbar.set
+        self._text_box.pack(expand=True, fill="both", pady=0, padx=1, anchor = "w")
+        hscrollbar.pack(expand=True, fill="both", pady=2, padx=5)
+
+        vscrollbar = Tk.Scrollbar(ibox, orient=Tk.VERTICAL, command=self._text_box.yview)
+        self._text_box["yscrollcommand"]=vscrollbar.set
+        iibox.pack(expand=True, fill="both", pady=0, padx=1, side="left", anchor="e")
+        vscrollbar.pack(expand=True, fill="y", pady=2, padx=1, side = "left", anchor = "e")
+        ibox.pack(expand=True, fill="both", pady=0, padx=5)
+
+        self._text_box.insert(Tk.END, self.text)
+        # Track modifications so cb_ok only fetches the text from Tk if it has been edited
+        self._text_box.edit_modified(False)
+        self._text_box.bind("<<Modified>>", self.cb_text_modified)
+        self._text_box.configure(wrap=Tk.WORD if self._word_wrap_tkval.get() else Tk.NONE)
+
+        box.pack(fill="x", pady=2)
+
+        # OK and Cancel button
+        box = Tk.Frame(self._frame)
+        self._ok_button = Tk.Button(box, text="OK", command=self.cb_ok)
+        self._ok_button.pack(ipadx=10, ipady=4, pady=5, padx=5, side="left")
+        self._cancel = Tk.Button(box, text="Cancel", command=self.cb_cancel)
+        self._cancel.pack(ipadx=10, ipady=4, pady=5, padx=5, side="right")
+        box.pack(expand=False)
+
+        # Ensure that the window opens centered on the screen. Geometry management is done
+        # once for all widgets here, the window is still unmapped so we need the requested size.
+        self._root.update_idletasks()
+
+        if AskTextTK._screen_width is None:
+            AskTextTK._screen_width = self._root.winfo_screenwidth()
+            AskTextTK._screen_height = self._root.winfo_screenheight()
+        screen_width = AskTextTK._screen_width
+        screen_height = AskTextTK._screen_height
+        window_width = self._root.winfo_reqwidth()
+        window_height = self._root.winfo_reqheight()
+        window_xpos = (screen_width/2) - (window_width/2)
+        window_ypos = (screen_height/2) - (window_height/2)
+        self._root.geometry('%dx%d+%d+%d' % (window_width, window_height, window_xpos, window_ypos))
+        self._root.deiconify()
+
+        # Update status
+        self.on_texcmd_change()
+
+        self._root.mainloop()
+        return self._gui_config
+
+    def cb_ok(self, widget=None, data=None):
+        try:
+            self.global_scale_factor = float(self._scale.get())
+        except ValueError:
+            TkMsgBoxes.showerror("Scale factor error",
+                                 "Please enter a valid floating point number for the scale factor!")
+            return
+        if self._text_modified:
+            self.text = self._text_box.get(1.0, "end-1c")  # end-1c: without the newline Tk appends
+            self._text_modified = False
+        self.preamble_file = self._preamble.get()
+        self.current_convert_strokes_to_path = self._convert_strokes_to_path.get()
+
+        try:
+            self.callback(self.text, self.preamble_file, self.global_scale_factor, self._alignment_tk_str.get(),
+                          self._tex_command_tk_str.get(), self.current_convert_strokes_to_path)
+        except Exception as error:
+            self.show_error_dialog("TexText Error",
+                              "Error occurred while converting text from Latex to SVG:",
+                              error)
+            return False
+
+        self._frame.quit()
+        return False
+
+    def cb_text_modified(self, event=None):
+        # Resetting the flag emits <<Modified>> again, hence the check
+        if self._text_box.edit_modified():
+            self._text_modified = True
+            self._text_box.edit_modified(False)
+
+    def cb_word_wrap(self, widget=None, data=None):
+        self._text_box.configure(wrap=Tk.WORD if self._word_wrap_tkval.get() else Tk.NONE)
+        self._gui_config["word_wrap"] = self._word_wrap_tkval.get()
+
+    def on_texcmd_change(self, _=None):
+        using_tex = self._tex_command_tk_str.get() != "typst"
+        self._preamble["state"] = Tk.NORMAL if using_tex else Tk.DISABLED
+        self._askfilename_button["state"] = Tk.NORMAL if using_tex else Tk.DISABLED
+
+    def reset_scale_factor(self, _=None):
+        self._scale.delete(0, "end")
+        self._scale.insert(0, self.current_scale_factor)
+
+    def use_global_scale_factor(self, _=None):
+        self._scale.delete(0, "end")
+        self._scale.insert(0, self.global_scale_factor)
+
+    def select_preamble_file(self):
+        file_name = TkFileDialogs.askopenfilename(initialdir=os.path.dirname(self._preamble.get()),
+                                                  title="Select preamble file",
+                                                  filetypes=(("LaTeX files", "*.tex"), ("all files", "*.*")))
+        if file_name is not None:
+            self._preamble.delete(0, Tk.END)
+            self._preamble.insert(Tk.END, file_name)
+
+    def show_error_dialog(self, title, message_text, exception):
+        from .errors import TexTextCommandFailed
+
+        # ToDo: Check Windows behavior!! --> -disable
+        self._root.wm_attributes("-topmost", False)
+
+        err_dialog = Tk.Toplevel(self._frame)
+        err_dialog.minsize(300, 400)
+        err_dialog.transient(self._frame)
+        err_dialog.focus_force()
+        err_dialog.grab_set()
+
+        def add_textview(header, text):
+            err_dialog_frame = Tk.Frame(err_dialog)
+            err_dialog_label = Tk.Label(err_dialog_frame, text=header)
+            err_dialog_label.pack(side='top', fill=Tk.X)
+            err_dialog_text = Tk.Text(err_dialog_frame, height=10)
+            err_dialog_text.insert(Tk.END, text)
+            err_dialog_text.pack(side='left', fill=Tk.Y)
+            err_dialog_scrollbar = Tk.Scrollbar(err_dialog_frame)
+            err_dialog_scrollbar.pack(side='right', fill=Tk.Y)
+            err_dialog_scrollbar.config(command=err_dialog_text.yview)
+            err_dialog_text.config(yscrollcommand=err_dialog_scrollbar.set)
+            err_dialog_frame.pack(side='top')
+
+        def close_error_dialog():
+            # ToDo: Check Windows behavior!! -disable
+            self._root.wm_attributes("-topmost", True)
+            err_dialog.destroy()
+
+        err_dialog.protocol("WM_DELETE_WINDOW", close_error_dialog)
+
+        add_textview(message_text, str(exception))
+
+        if isinstance(exception, TexTextCommandFailed):
+            if exception.stdout:
+                add_textview('Stdout:', decode_process_output(exception.stdout))
+
+            if exception.stderr:
+                add_textview('Stderr:', decode_process_output(exception.stderr))
+
+        close_button = Tk.Button(err_dialog, text='OK', command=close_error_dialog)
+        close_button.pack(side='top', fill='x', expand=True)
@@ -180,8 +180,6 @@ class TexText(inkex.EffectExtension):
 
     def effect(self):
         """Perform the effect: create/modify TexText objects"""
-        from .asktext import AskTextDefault
-
         with logger.debug("TexText.effect"):
 
             # Find root element
@@ -219,7 +217,7 @@ class TexText(inkex.EffectExtension):
 
                 current_tex_command = old_svg_ele.get_meta("texconverter", current_tex_command)
 
-            gui_config = self.config.get("gui", {})
+            gui_config = self.config.setdefault("gui", {})
 
             # Ask for TeX code
             if self.options.text is None:
@@ -248,6 +246,8 @@ class TexText(inkex.EffectExtension):
                     logger.debug("Preamble file is not found")
                     preamble_file = ""
 
+                # Importing the GUI bindings is expensive, so only do it if the dialog is really shown
+                from .asktext import AskTextDefault
                 asker = AskTextDefault(__version__, text, preamble_file, global_scale_factor, current_scale,
                                        current_alignment=alignment, current_texcmd=current_tex_command,
                                        current_convert_strokes_to_path=current_convert_strokes_to_path,
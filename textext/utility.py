@@ -190,6 +190,13 @@ class Settings(object):
             return default
         return result
 
+    def setdefault(self, key, default=None):
+        result = self.get(key)
+        if result is None:
+            self[key] = default
+            result = default
+        return result
+
     def delete_file(self):
         if os.path.exists(self.config_path):
             try: